@@ -0,0 +1,181 @@
+import json
+from typing import Any, Dict, Optional
+
+# Scanner states for the top-level object
+EXPECT_KEY = "expect_key"
+IN_KEY = "in_key"
+EXPECT_COLON = "expect_colon"
+EXPECT_VALUE = "expect_value"
+IN_VALUE = "in_value"
+AFTER_VALUE = "after_value"
+
+PRIMITIVE_END = set(",}] \t\r\n")
+
+
+class IncrementalActionParser:
+    """Pull the first JSON object out of a (possibly streamed) LLM completion.
+
+    Text can be fed in arbitrary chunks. Prose, code fences and trailing
+    commentary around the object are ignored. Top-level fields become
+    available in `fields` as soon as their value is complete, so callers
+    can act on `action`/`action_input` before the rest of the object
+    (e.g. a long `thought`) has been generated.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._reset_candidate()
+
+    def _reset_candidate(self):
+        self._start = -1        # index of the opening brace of the candidate object
+        self._state = EXPECT_KEY
+        self._in_string = False
+        self._escape = False
+        self._token_start = -1  # start of the key or value being scanned
+        self._value_depth = 0   # nesting depth inside a compound value
+        self._key: Optional[str] = None
+
+    def _abandon_candidate(self):
+        """Drop the current candidate and rescan from just after its brace."""
+        self._pos = self._start + 1
+        self.fields = {}
+        self._reset_candidate()
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """Consume another chunk of text and return the fields parsed so far."""
+        if self.complete or not chunk:
+            return self.fields
+        self._buffer += chunk
+        self._scan()
+        return self.fields
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return self._buffer
+
+    def has(self, *keys: str) -> bool:
+        """Return True once all of the given top-level keys have complete values."""
+        return all(key in self.fields for key in keys)
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Return the parsed object, or the fields seen so far if it never closed."""
+        if self.complete or self.fields:
+            return dict(self.fields)
+        return None
+
+    def _store_value(self, end: int) -> bool:
+        raw = self._buffer[self._token_start:end]
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return False
+        self.fields[self._key] = value
+        self._key = None
+        self._state = AFTER_VALUE
+        return True
+
+    def _scan(self):
+        buf = self._buffer
+        while self._pos < len(buf) and not self.complete:
+            ch = buf[self._pos]
+
+            if self._start < 0:
+                if ch == "{":
+                    self._start = self._pos
+                    self._state = EXPECT_KEY
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._state == IN_KEY:
+                        try:
+                            self._key = json.loads(buf[self._token_start:self._pos + 1])
+                        except json.JSONDecodeError:
+                            self._abandon_candidate()
+                            continue
+                        self._state = EXPECT_COLON
+                    elif self._state == IN_VALUE and self._value_depth == 0:
+                        if not self._store_value(self._pos + 1):
+                            self._abandon_candidate()
+                            continue
+                self._pos += 1
+                continue
+
+            if self._state == EXPECT_KEY:
+                if ch == '"':
+                    self._state = IN_KEY
+                    self._in_string = True
+                    self._token_start = self._pos
+                elif ch == "}":
+                    self._finish()
+                elif not ch.isspace():
+                    self._abandon_candidate()
+                    continue
+            elif self._state == EXPECT_COLON:
+                if ch == ":":
+                    self._state = EXPECT_VALUE
+                elif not ch.isspace():
+                    self._abandon_candidate()
+                    continue
+            elif self._state == EXPECT_VALUE:
+                if not ch.isspace():
+                    self._state = IN_VALUE
+                    self._token_start = self._pos
+                    self._value_depth = 0
+                    if ch == '"':
+                        self._in_string = True
+                    elif ch in "{[":
+                        self._value_depth = 1
+                    elif ch in ",}]":
+                        self._abandon_candidate()
+                        continue
+            elif self._state == IN_VALUE:
+                if self._value_depth > 0:
+                    if ch == '"':
+                        self._in_string = True
+                    elif ch in "{[":
+                        self._value_depth += 1
+                    elif ch in "}]":
+                        self._value_depth -= 1
+                        if self._value_depth == 0 and not self._store_value(self._pos + 1):
+                            self._abandon_candidate()
+                            continue
+                elif ch in PRIMITIVE_END:
+                    # Bare value (number, true/false/null) ends at a delimiter;
+                    # reprocess the delimiter in the AFTER_VALUE state.
+                    if not self._store_value(self._pos):
+                        self._abandon_candidate()
+                        continue
+                    continue
+            elif self._state == AFTER_VALUE:
+                if ch == ",":
+                    self._state = EXPECT_KEY  # a trailing comma before '}' is tolerated
+                elif ch == "}":
+                    self._finish()
+                elif not ch.isspace():
+                    self._abandon_candidate()
+                    continue
+
+            self._pos += 1
+
+    def _finish(self):
+        self.complete = True
+        self._pos += 1
+
+
+def parse_action(text: str) -> Optional[Dict[str, Any]]:
+    """Extract the first JSON object from mixed text (fences, prose, commentary)."""
+    parser = IncrementalActionParser()
+    parser.feed(text)
+    return parser.result()
+
@@ -1,11 +1,15 @@
 import json
-from typing import List, Dict, Any, Callable, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from dataclasses import dataclass
 from api_client import OpenRouterClient
+from action_parser import IncrementalActionParser
+from speculation import Speculation, SpeculationStats, ToolPredictor
+from model_router import ModelRouter
 import os
 import httpx
 from dotenv import load_dotenv
 import asyncio
+import time
 
 @dataclass
 class Tool:
@@ -13,12 +17,27 @@ class Tool:
     description: str
     func: Callable
     instruction: Optional[str] = None  # Added instruction field
+    # Side-effect free and independent of action_input, so the agent may start
+    # it before the LLM has picked it and reuse the result if the LLM agrees
+    speculative: bool = False
+    # Called with the result of func once the LLM has picked the tool; holds the
+    # side effects (e.g. posting to Slack) and its return value is the answer
+    publish: Optional[Callable] = None
 
 class Agent:
-    def __init__(self, tools: List[Tool], llm_client: OpenRouterClient):
+    def __init__(self, tools: List[Tool], llm_client: OpenRouterClient,
+                 speculate: bool = False, predictor: Optional[ToolPredictor] = None,
+                 router: Optional[ModelRouter] = None):
         self.tools = tools
         self.llm_client = OpenRouterClient(api_key=os.getenv('OPENROUTER_API_KEY'))
-        self.llm_client.model = "x-ai/grok-3-mini"  # Updated model name
+        self.llm_client.model = "x-ai/grok-3-mini"  # Default when no router is configured
+        # Adaptive model routing; picks a model per request from rolling stats
+        self.router = router
+        # Speculative mode: run the predicted tool concurrently with the LLM call
+        self.speculate = speculate
+        self.predictor = predictor or ToolPredictor()
+        self.speculation_stats = SpeculationStats()
+        self._tools_desc: Optional[str] = None  # Built once on first prompt
         
     def preprocess_prompt(self, user_input: str) -> str:
         """Preprocess the user input to include a verb and normalize locations."""
@@ -28,16 +47,27 @@ class Agent:
             words[1] = normalize_location(words[1])
         return " ".join(words)
 
-    def _create_prompt(self, user_input: str) -> str:
-        # Filter tools to include only the grocery-related and weather-related tools
-        selected_tools = [tool for tool in self.tools if tool.name in [
-            "get_household_grocery_report", "get_bangalore_weather"
-        ]]
+    def _get_tools_desc(self) -> str:
+        if self._tools_desc is None:
+            # Filter tools to include only the grocery-related and weather-related tools
+            selected_tools = [tool for tool in self.tools if tool.name in [
+                "get_household_grocery_report", "get_bangalore_weather"
+            ]]
 
-        tools_desc = "\n".join([
-            f"- {tool.name}: {tool.description} {tool.instruction if tool.instruction else ''}".strip()
-            for tool in selected_tools
-        ])
+            self._tools_desc = "\n".join([
+                f"- {tool.name}: {tool.description} {tool.instruction if tool.instruction else ''}".strip()
+                for tool in selected_tools
+            ])
+        return self._tools_desc
+
+    def _create_prompt(self, user_input: str, history: Optional[List[str]] = None) -> str:
+        tools_desc = self._get_tools_desc()
+
+        # Earlier requests and answers from the same session help resolve follow-ups like "and tomorrow?"
+        history_desc = ""
+        if history:
+            history_desc = "Earlier requests in this conversation and their answers:\n" + \
+                "\n".join(f"- {previous}" for previous in history) + "\n\n"
 
         ############### Prompt Template ###############
         prompt = (
@@ -47,13 +77,14 @@ class Agent:
             f"- For groceries-related queries (e.g., 'get me groceries report', 'household grocery list'), use the 'get_household_grocery_report' tool.\n"
             f"- For weather-related queries (e.g., 'what is the weather in Bangalore', 'get Bangalore weather'), use the 'get_bangalore_weather' tool.\n\n"
             f"You MUST use one of the above tools to answer. Always include 'action_input' in your response, even if it is empty. If no suitable tool exists, respond with:\n"
-            f"{{\"thought\": \"No appropriate tool available for this query\",\n"
-            f" \"action\": \"error\",\n"
-            f" \"action_input\": \"no_suitable_tool\"}}\n\n"
+            f"{{\"action\": \"error\",\n"
+            f" \"action_input\": \"no_suitable_tool\",\n"
+            f" \"thought\": \"No appropriate tool available for this query\"}}\n\n"
             f"To use a tool, respond with:\n"
-            f"{{\"thought\": \"your reasoning here\",\n"
-            f" \"action\": \"tool_name\",\n"
-            f" \"action_input\": \"input_for_tool\"}}\n\n"
+            f"{{\"action\": \"tool_name\",\n"
+            f" \"action_input\": \"input_for_tool\",\n"
+            f" \"thought\": \"your reasoning here\"}}\n\n"
+            f"{history_desc}"
             f"User request: {user_input}\n"
             f"Which tool would you like to use?"
         )
@@ -65,104 +96,185 @@ class Agent:
 
         return prompt
 
-    def _parse_response(self, response: Any) -> Dict[str, Any]:
+    def _choose_model(self, requested: Optional[str] = None) -> str:
+        if self.router:
+            return self.router.choose(requested)
+        return requested or self.llm_client.model
+
+    def _stream_action(self, prompt: str, model: Optional[str] = None) -> Dict[str, Any]:
+        """Stream the LLM completion until 'action' and 'action_input' are complete.
+
+        The prompt asks for 'action' and 'action_input' before 'thought', so the
+        stream is closed as soon as the action is known without waiting for the
+        reasoning or any trailing commentary.
+        """
+        model = model or self.llm_client.model
+        parser = IncrementalActionParser()
+        usage: Dict[str, int] = {}
+        started_at = time.perf_counter()
+        stream = self.llm_client.stream_prompt(prompt, model=model, usage=usage)
         try:
-            # Debug: Log the type and value of the response
-            print(f"Debug: Type of response: {type(response)}, Value: {response}")
-
-            # Ensure the response is a string before parsing
-            if isinstance(response, dict):
-                print("Warning: Response is already a dictionary. Skipping parsing.")
-                return response  # Return the dictionary as-is
-            parsed_response = json.loads(response)
-            return parsed_response
-        except json.JSONDecodeError:
-            print(f"Raw AI Response: {response}")  # Log raw response for debugging
-            return {"thought": "Error parsing response", "action": "error", "action_input": "parse_error"}
-    
-    async def run(self, user_input: str, max_steps: int = 5) -> str:
+            for chunk in stream:
+                parser.feed(chunk)
+                if parser.complete or parser.has("action", "action_input"):
+                    break
+        except Exception:
+            if self.router:
+                self.router.record(model, time.perf_counter() - started_at, error=True)
+            raise
+        finally:
+            stream.close()
+
+        print(f"Raw AI Response ({model}): {parser.text}")  # Log what was read before dispatch
+
+        parsed = parser.result()
+        if not isinstance(parsed, dict) or "action" not in parsed:
+            # A completion without a usable action counts against the model's error rate
+            if self.router:
+                self.router.record(model, time.perf_counter() - started_at, error=True)
+            raise ValueError("Parsed response is invalid or missing required keys.")
+
+        if self.router:
+            # Usage only arrives at the end of the stream; estimate (~4 chars/token) when we stopped early
+            self.router.record(
+                model,
+                time.perf_counter() - started_at,
+                prompt_tokens=usage.get("prompt_tokens", len(prompt) // 4),
+                completion_tokens=usage.get("completion_tokens", len(parser.text) // 4),
+                estimated=not usage,
+            )
+        return parsed
+
+    async def _call(self, func: Callable, arg: Any) -> Any:
+        # Check if the function is asynchronous
+        if asyncio.iscoroutinefunction(func):
+            return await func(arg)
+        # Run sync functions in a thread so they can overlap with the LLM call
+        return await asyncio.to_thread(func, arg)
+
+    async def _execute_tool(self, tool: Tool, tool_input: Any) -> Any:
+        return await self._call(tool.func, tool_input)
+
+    def _start_speculation(self, user_input: str) -> Optional[Speculation]:
+        """Start the predicted tool, if it is safe to speculate, without awaiting it."""
+        if not self.speculate or not user_input.strip():
+            return None
+        tool_name = self.predictor.predict(self.preprocess_prompt(user_input))
+        tool = next((t for t in self.tools if t.name == tool_name), None)
+        if tool is None or not tool.speculative:
+            return None
+
+        async def run_tool():
+            try:
+                return await self._execute_tool(tool, "default_input")
+            finally:
+                speculation.finished_at = time.perf_counter()
+
+        speculation = Speculation(tool_name=tool.name, task=None)
+        speculation.task = asyncio.create_task(run_tool())
+        self.speculation_stats.attempts += 1
+        print(f"Speculatively started tool '{tool.name}'.")
+        return speculation
+
+    async def run(self, user_input: str, max_steps: int = 5, model: Optional[str] = None,
+                  history: Optional[List[str]] = None) -> str:
+        _, response = await self.run_with_status(user_input, max_steps, model, history)
+        return response
+
+    async def run_with_status(self, user_input: str, max_steps: int = 5, model: Optional[str] = None,
+                              history: Optional[List[str]] = None) -> Tuple[bool, str]:
+        """Like run(), but also return whether a tool actually answered the request.
+
+        The failure messages are still returned as text for display; callers that
+        keep state per answer (e.g. session history) should use the flag instead.
+        """
         step = 0
         while step < max_steps:
             # Get next action from LLM
-            prompt = self._create_prompt(user_input)
-            response = self.llm_client.send_prompt(prompt, model=self.llm_client.model)
-
-            # Debugging: Log the AI's response
-            print(f"AI Response: {response}")
-
-            # Debugging: Log the raw AI response
-            print(f"Raw AI Response: {response}")
+            prompt = self._create_prompt(user_input, history)
+            speculation = self._start_speculation(user_input)
+            selected_model = self._choose_model(model)
+            llm_started_at = time.perf_counter()
 
             try:
-                # Debugging: Print the type of the response object
-                print(f"Type of response['response']: {type(response['response'])}")
-
-                # Ensure proper parsing of response['response']
-                if isinstance(response["response"], str):
-                    parsed_response = json.loads(response["response"])
-                else:
-                    parsed_response = response["response"]
-
-                # Validate parsed response structure
-                if not isinstance(parsed_response, dict) or "action" not in parsed_response:
-                    raise ValueError("Parsed response is invalid or missing required keys.")
-
-                parsed = self._parse_response(parsed_response)
-            except (KeyError, json.JSONDecodeError, ValueError) as e:
-                print(f"Error: Failed to parse AI response. Details: {str(e)}")
-                return f"Error: Failed to parse AI response. Details: {str(e)}"
-
-            print(f"Parsed Response: {parsed}")  # Log the parsed response for debugging
-
-            # Handle error cases
-            if parsed.get("action") == "error":
-                if parsed.get("action_input") == "no_suitable_tool":
-                    return "I apologize, but I don't have the appropriate tools to answer this question. I can only help with: " + \
-                           ", ".join(tool.name for tool in self.tools)
-                return "There was an error processing your request."
-
-            # Execute tool if specified
-            if "action" in parsed:
-                tool_name = parsed["action"]
-                tool_input = parsed.get("action_input")  # Use .get() to avoid KeyError
-
-                # Handle 'none' as a valid input
-                if tool_input == "none":
-                    tool_input = ""  # Replace 'none' with an empty string
-
-                # Assign a default value if 'action_input' is missing or invalid
-                if not tool_input:  # Covers both None and empty string
-                    print("Warning: 'action_input' is missing or invalid. Using default value.")
-                    tool_input = "default_input"  # Replace with an appropriate default value
-
-                # Find and execute the tool
-                if tool_input is None:
-                    return "Error: Missing 'action_input' in the response."
-
-                tool = next((t for t in self.tools if t.name == tool_name), None)
-                if tool is None:
-                    return f"Error: Tool '{tool_name}' not found."
-
-                # Check if the tool function is asynchronous
-                if asyncio.iscoroutinefunction(tool.func):
-                    result = await tool.func(tool_input)
-                else:
-                    result = tool.func(tool_input)
-
-                # Debugging: Log the type of the result
-                print(f"Result type: {type(result)}")
-                print(f"Result value: {result}")
-
-                print(f"Tool '{tool_name}' executed successfully.")
-
-                # Ensure result is a string before returning
-                if isinstance(result, dict):
-                    return json.dumps(result, indent=2)
-                return str(result)
+                try:
+                    # Stream the completion and dispatch as soon as the action is known
+                    parsed = await asyncio.to_thread(self._stream_action, prompt, selected_model)
+                except Exception as e:
+                    if speculation:
+                        self.speculation_stats.record_miss()
+                    print(f"Error: Failed to parse AI response. Details: {str(e)}")
+                    return False, f"Error: Failed to parse AI response. Details: {str(e)}"
+
+                llm_seconds = time.perf_counter() - llm_started_at
+                print(f"Parsed Response: {parsed}")  # Log the parsed response for debugging
+
+                # Keep the speculative result only if the LLM picked the same tool
+                if speculation and speculation.tool_name != parsed.get("action"):
+                    print(f"Speculation missed: predicted '{speculation.tool_name}', LLM chose '{parsed.get('action')}'.")
+                    speculation.discard()
+                    self.speculation_stats.record_miss()
+                    speculation = None
+
+                # Handle error cases
+                if parsed.get("action") == "error":
+                    if parsed.get("action_input") == "no_suitable_tool":
+                        return False, "I apologize, but I don't have the appropriate tools to answer this question. I can only help with: " + \
+                               ", ".join(tool.name for tool in self.tools)
+                    return False, "There was an error processing your request."
+
+                # Execute tool if specified
+                if "action" in parsed:
+                    tool_name = parsed["action"]
+                    tool_input = parsed.get("action_input")  # Use .get() to avoid KeyError
+
+                    # Handle 'none' as a valid input
+                    if tool_input == "none":
+                        tool_input = ""  # Replace 'none' with an empty string
+
+                    # Assign a default value if 'action_input' is missing or invalid
+                    if not tool_input:  # Covers both None and empty string
+                        print("Warning: 'action_input' is missing or invalid. Using default value.")
+                        tool_input = "default_input"  # Replace with an appropriate default value
+
+                    # Find and execute the tool
+                    if tool_input is None:
+                        return False, "Error: Missing 'action_input' in the response."
+
+                    tool = next((t for t in self.tools if t.name == tool_name), None)
+                    if tool is None:
+                        return False, f"Error: Tool '{tool_name}' not found."
+
+                    if speculation:
+                        result = await speculation.task
+                        self.speculation_stats.record_hit(llm_seconds, speculation.tool_seconds)
+                        speculation = None  # Result used; nothing left to discard
+                        print(f"Speculation hit for '{tool_name}'.")
+                    else:
+                        result = await self._execute_tool(tool, tool_input)
+
+                    # Side effects (e.g. posting to Slack) only run once the LLM has picked the tool
+                    if tool.publish:
+                        result = await self._call(tool.publish, result)
+
+                    # Debugging: Log the type of the result
+                    print(f"Result type: {type(result)}")
+                    print(f"Result value: {result}")
+
+                    print(f"Tool '{tool_name}' executed successfully.")
+
+                    # Ensure result is a string before returning
+                    if isinstance(result, dict):
+                        return True, json.dumps(result, indent=2)
+                    return True, str(result)
+            finally:
+                # Covers misses, early returns, errors and cancellation of the run itself
+                if speculation:
+                    speculation.discard()
 
             step += 1
 
-        return "Max steps reached without finding an answer."
+        return False, "Max steps reached without finding an answer."
 
 # Load environment variables from .env file
 load_dotenv()
@@ -208,14 +320,16 @@ def get_household_grocery_report(input: str):
 get_bangalore_weather_tool = Tool(
     name="get_bangalore_weather",
     description="Fetches the current weather information for Bangalore and posts it to a Slack channel.",
-    func=get_bangalore_weather
+    func=get_bangalore_weather,
+    speculative=True  # Simulated data, no Slack post
 )
 
 # Define the 'get_household_grocery_report' tool
 get_household_grocery_report_tool = Tool(
     name="get_household_grocery_report",
     description="Fetches the household grocery report.",
-    func=get_household_grocery_report
+    func=get_household_grocery_report,
+    speculative=True
 )
 
 def add_verb_to_prompt(prompt: str, default_verb: str = "Find") -> str:
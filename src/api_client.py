@@ -1,7 +1,11 @@
 import os
+import json
 import requests
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+# (connect, read) timeout in seconds for streamed completions
+STREAM_TIMEOUT = (10.0, 60.0)
 
 class OpenRouterClient:
     def __init__(self, api_key: Optional[str] = None):
@@ -87,6 +91,71 @@ class OpenRouterClient:
                 "error": error_msg
             }
 
+    def stream_prompt(
+        self,
+        prompt: str,
+        model: str = "mistralai/mistral-7b-instruct",
+        usage: Optional[Dict[str, int]] = None,
+        timeout: Tuple[float, float] = STREAM_TIMEOUT
+    ) -> Iterator[str]:
+        """Yield completion text deltas as they arrive (server-sent events).
+
+        Closing the generator early closes the HTTP response, so callers can
+        stop reading once they have what they need. If a `usage` dict is
+        passed it is filled with the token counts from the final chunk,
+        which only arrives when the stream is read to the end.
+
+        `timeout` is (connect, read) seconds; the read timeout applies to the
+        gap between chunks, so a hung stream raises instead of blocking forever.
+        """
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "stream": True,
+            "usage": {"include": True}
+        }
+
+        print("Streaming request to OpenRouter...")
+        response = requests.post(
+            f"{self.base_url}/chat/completions",
+            headers=self._get_headers(),
+            json=payload,
+            stream=True,
+            timeout=timeout
+        )
+        try:
+            print(f"Response status code: {response.status_code}")
+            if response.status_code != 200:
+                raise ValueError(f"Error: {response.status_code}, {response.text}")
+
+            for line in response.iter_lines(decode_unicode=True):
+                # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank lines
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if usage is not None and chunk.get("usage"):
+                    usage.update({
+                        "prompt_tokens": chunk["usage"].get("prompt_tokens", 0),
+                        "completion_tokens": chunk["usage"].get("completion_tokens", 0),
+                        "total_tokens": chunk["usage"].get("total_tokens", 0)
+                    })
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+        finally:
+            response.close()
+
 # For standalone usage
 if __name__ == "__main__":
     client = OpenRouterClient()
@@ -1,9 +1,13 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from typing import Optional, List
 
 from api_client import OpenRouterClient
 from agent import Agent, Tool
+from model_router import ModelRouter
+from sessions import Session, SessionManager
 from tools import TOOLS
 
 app = FastAPI()
@@ -13,13 +17,28 @@ client = OpenRouterClient()
 
 # Initialize agent with tools
 agent = Agent(
-    tools=[Tool(name=tool["name"], description=tool["description"], func=tool["func"]) for tool in TOOLS],
-    llm_client=client
+    tools=[
+        Tool(name=tool["name"], description=tool["description"], func=tool["func"],
+             speculative=tool.get("speculative", False), publish=tool.get("publish"))
+        for tool in TOOLS
+    ],
+    llm_client=client,
+    speculate=True,
+    router=ModelRouter()
 )
 
+# Per-connection state for the /ws endpoint
+sessions = SessionManager()
+
+def _close_evicted_session(session: Session, reason: str):
+    if session.websocket is not None:
+        asyncio.create_task(session.websocket.close(code=1001, reason=reason))
+
+sessions.on_evict = _close_evicted_session
+
 class Prompt(BaseModel):
     text: str
-    model: Optional[str] = "mistralai/mistral-7b-instruct"  # Default to Mistral model
+    model: Optional[str] = None  # Leave unset to let the model router choose
 
 @app.get("/health")
 async def health_check():
@@ -29,11 +48,23 @@ async def health_check():
         "available_tools": [tool["name"] for tool in TOOLS]
     }
 
+@app.get("/stats/speculation")
+async def speculation_stats():
+    return agent.speculation_stats.as_dict()
+
+@app.get("/stats/models")
+async def model_stats():
+    return agent.router.report()
+
+@app.get("/stats/sessions")
+async def session_stats():
+    return sessions.report()
+
 @app.post("/ask")
 async def ask_question(prompt: Prompt):
     try:
         # Use the agent to process the request
-        response = await agent.run(prompt.text)  # Add await here
+        response = await agent.run(prompt.text, model=prompt.model)  # Add await here
         return {
             "prompt": prompt.text,
             "response": response,
@@ -42,6 +73,95 @@ async def ask_question(prompt: Prompt):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _send(session: Session, payload: dict):
+    async with session.send_lock:
+        try:
+            await session.websocket.send_json(payload)
+        except (WebSocketDisconnect, RuntimeError):
+            pass  # Client went away while the answer was in flight
+
+async def _answer(session: Session, request_id: str, text: str, model: Optional[str]):
+    try:
+        answered, response = await agent.run_with_status(text, model=model, history=list(session.history))
+        # Only answered prompts become context; failed or cancelled ones are not recorded
+        if answered:
+            session.add_turn(text, response)
+        payload = {"request_id": request_id, "prompt": text, "response": response, "agent": True}
+    except Exception as e:
+        payload = {"request_id": request_id, "error": str(e)}
+    finally:
+        session.in_flight.pop(request_id, None)
+    await _send(session, payload)
+
+@app.websocket("/ws")
+async def websocket_session(websocket: WebSocket):
+    """Keep one connection open for many prompts.
+
+    Client messages: {"request_id": "...", "text": "...", "model": "..."} to ask,
+    {"type": "cancel", "request_id": "..."} to cancel. Answers carry the request_id
+    and may arrive in any order.
+    """
+    await websocket.accept()
+    session = sessions.open()
+    session.websocket = websocket
+    next_id = 0
+    await _send(session, {"type": "session", "session_id": session.id})
+
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(websocket.receive(), timeout=sessions.idle_timeout)
+            except asyncio.TimeoutError:
+                if session.in_flight:
+                    continue
+                await websocket.close(code=1000, reason="idle timeout")
+                break
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            sessions.touch(session)
+
+            try:
+                if frame.get("text") is None:
+                    raise ValueError("expected a text frame")
+                message = json.loads(frame["text"])
+                if not isinstance(message, dict):
+                    raise ValueError("message must be a JSON object")
+            except ValueError as e:
+                await _send(session, {"error": f"Invalid message: {e}"})
+                continue
+
+            request_id = message.get("request_id")
+            if request_id is None:
+                next_id += 1
+                request_id = str(next_id)
+            request_id = str(request_id)
+
+            if message.get("type") == "cancel":
+                task = session.in_flight.pop(request_id, None)
+                if task:
+                    task.cancel()
+                await _send(session, {"request_id": request_id, "cancelled": task is not None})
+                continue
+
+            text = message.get("text")
+            if not isinstance(text, str) or not text.strip():
+                await _send(session, {"request_id": request_id, "error": "Missing 'text'"})
+                continue
+            if request_id in session.in_flight:
+                await _send(session, {"request_id": request_id, "error": "Duplicate request_id in flight"})
+                continue
+            if len(session.in_flight) >= sessions.max_in_flight:
+                await _send(session, {"request_id": request_id, "error": "Too many requests in flight"})
+                continue
+
+            session.in_flight[request_id] = asyncio.create_task(
+                _answer(session, request_id, text, message.get("model"))
+            )
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # Client disconnected, or the session was evicted and its socket closed
+    finally:
+        sessions.close(session)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
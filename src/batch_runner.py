@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from agent import Agent
+
+
+def iter_prompts(path: str, field: str, start: int = 0) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Yield (line_index, record) pairs lazily. Blank lines yield a None record."""
+    with open(path, "r", encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            if index < start:
+                continue
+            line = line.strip()
+            if not line:
+                yield index, None
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield index, {"_error": "invalid JSON line"}
+                continue
+            if isinstance(record, str):
+                record = {field: record}
+            elif not isinstance(record, dict):
+                record = {"_error": "line is not a JSON object or string"}
+            yield index, record
+
+
+class Checkpoint:
+    """Track the low-water mark of completed line indexes and persist it atomically.
+
+    Every line below `watermark` has a result in the output file. Lines above it
+    may have completed out of order; those are recovered from the output file on
+    resume.
+    """
+
+    def __init__(self, path: str, every: int = 100):
+        self.path = path
+        self.every = every
+        self.watermark = 0
+        self.completed = 0
+        self._done_ahead: Set[int] = set()
+        self._since_save = 0
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.watermark = data.get("watermark", 0)
+            self.completed = data.get("completed", 0)
+
+    def mark_done(self, index: int):
+        self._done_ahead.add(index)
+        while self.watermark in self._done_ahead:
+            self._done_ahead.remove(self.watermark)
+            self.watermark += 1
+        self._since_save += 1
+        if self._since_save >= self.every:
+            self.save()
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.watermark, "completed": self.completed}, f)
+        os.replace(tmp_path, self.path)
+        self._since_save = 0
+
+
+def recover_output(path: str, watermark: int) -> Set[int]:
+    """Return indexes at or above the watermark already present in the output file.
+
+    A partial last line left by a crash is truncated so appends stay valid JSONL.
+    """
+    done: Set[int] = set()
+    if not os.path.exists(path):
+        return done
+    valid_end = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                index = json.loads(raw)["index"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                break
+            valid_end += len(raw)
+            if index >= watermark:
+                done.add(index)
+    if valid_end != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_end)
+    return done
+
+
+class BatchRunner:
+    def __init__(self, agent: "Agent", input_path: str, output_path: str, checkpoint_path: str,
+                 field: str = "text", concurrency: int = 8, max_steps: int = 5,
+                 progress_interval: float = 2.0, checkpoint_every: int = 100):
+        self.agent = agent
+        self.input_path = input_path
+        self.output_path = output_path
+        self.field = field
+        self.concurrency = concurrency
+        self.max_steps = max_steps
+        self.progress_interval = progress_interval
+        self.checkpoint = Checkpoint(checkpoint_path, every=checkpoint_every)
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+
+    async def _process(self, index: int, record: Dict[str, Any], out) -> None:
+        started_at = time.perf_counter()
+        result: Dict[str, Any] = {"index": index}
+        text = record.get(self.field)
+        if record.get("_error") or not isinstance(text, str) or not text.strip():
+            result["error"] = record.get("_error") or f"missing '{self.field}' field"
+            self.failed += 1
+        else:
+            result["prompt"] = text
+            try:
+                result["response"] = await self.agent.run(text, max_steps=self.max_steps, model=record.get("model"))
+                self.succeeded += 1
+            except Exception as e:
+                result["error"] = str(e)
+                self.failed += 1
+        result["seconds"] = round(time.perf_counter() - started_at, 3)
+
+        # Written in completion order; the index ties each result back to its input line
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        self.checkpoint.completed += 1
+        self.checkpoint.mark_done(index)
+
+    async def _report_progress(self, started_at: float):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self._print_progress(started_at)
+
+    def _print_progress(self, started_at: float, end: str = "\r"):
+        elapsed = time.perf_counter() - started_at
+        done = self.succeeded + self.failed
+        rate = done / elapsed if elapsed else 0.0
+        sys.stderr.write(
+            f"done={done} ok={self.succeeded} failed={self.failed} skipped={self.skipped} "
+            f"rate={rate:.2f}/s elapsed={elapsed:.1f}s watermark={self.checkpoint.watermark}{end}"
+        )
+        sys.stderr.flush()
+
+    async def run(self):
+        self.checkpoint.load()
+        already_done = recover_output(self.output_path, self.checkpoint.watermark)
+        print(f"Resuming from line {self.checkpoint.watermark} "
+              f"({len(already_done)} later lines already completed).", file=sys.stderr)
+
+        started_at = time.perf_counter()
+        progress = asyncio.create_task(self._report_progress(started_at))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        in_flight: Set[asyncio.Task] = set()
+
+        async def bounded(index, record, out):
+            try:
+                await self._process(index, record, out)
+            finally:
+                semaphore.release()
+
+        try:
+            with open(self.output_path, "a", encoding="utf-8") as out:
+                for index, record in iter_prompts(self.input_path, self.field, start=self.checkpoint.watermark):
+                    if record is None or index in already_done:
+                        self.skipped += 1
+                        self.checkpoint.mark_done(index)
+                        continue
+                    # Backpressure: only `concurrency` prompts are read ahead of completion
+                    await semaphore.acquire()
+                    task = asyncio.create_task(bounded(index, record, out))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                if in_flight:
+                    await asyncio.gather(*in_flight)
+        finally:
+            progress.cancel()
+            self.checkpoint.save()
+            self._print_progress(started_at, end="\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through the agent.")
+    parser.add_argument("input", help="JSONL file, one prompt per line (object with a text field, or a JSON string)")
+    parser.add_argument("-o", "--output", help="Results JSONL file (default: <input>.results.jsonl)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.ckpt)")
+    parser.add_argument("--field", default="text", help="Field holding the prompt text (default: text)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Prompts in flight at once (default: 8)")
+    parser.add_argument("--max-steps", type=int, default=5, help="Agent max_steps per prompt (default: 5)")
+    parser.add_argument("--progress-interval", type=float, default=2.0, help="Seconds between progress lines")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Save the checkpoint every N results")
+    args = parser.parse_args()
+
+    # Imported here so the runner itself only needs an object with an async run()
+    from agent import Agent, Tool
+    from api_client import OpenRouterClient
+    from model_router import ModelRouter
+    from tools import TOOLS
+
+    output = args.output or f"{args.input}.results.jsonl"
+    checkpoint = args.checkpoint or f"{output}.ckpt"
+
+    agent = Agent(
+        tools=[
+            Tool(name=tool["name"], description=tool["description"], func=tool["func"],
+                 speculative=tool.get("speculative", False), publish=tool.get("publish"))
+            for tool in TOOLS
+        ],
+        llm_client=OpenRouterClient(),
+        speculate=True,
+        router=ModelRouter()
+    )
+    runner = BatchRunner(agent, args.input, output, checkpoint, field=args.field,
+                         concurrency=args.concurrency, max_steps=args.max_steps,
+                         progress_interval=args.progress_interval,
+                         checkpoint_every=args.checkpoint_every)
+    asyncio.run(runner.run())
+
+
+if __name__ == "__main__":
+    main()
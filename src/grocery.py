@@ -4,10 +4,10 @@ import httpx
 import json
 from slack_utils import post_json_to_slack
 
-def get_household_grocery_report(input: str):
-    """Generate a household grocery report and post it to Slack."""
+def fetch_household_grocery_report(input: str):
+    """Build the household grocery report without posting it anywhere."""
     # Example grocery data
-    grocery_data = {
+    return {
         "items": [
             {"name": "rice", "stock": 8, "deficit": 2},
             {"name": "sugar", "stock": 6, "deficit": 4},
@@ -15,6 +15,19 @@ def get_household_grocery_report(input: str):
         ]
     }
 
+async def publish_household_grocery_report(report: dict):
+    """Post a grocery report to Slack and return it unchanged."""
+    try:
+        await post_json_to_slack(format_grocery_report_for_slack(report))
+        print("Grocery report posted to Slack successfully.")
+    except Exception as e:
+        print(f"Failed to post grocery report to Slack: {e}")
+    return report
+
+def get_household_grocery_report(input: str):
+    """Generate a household grocery report and post it to Slack."""
+    grocery_data = fetch_household_grocery_report(input)
+
     # Format the grocery report for Slack
     formatted_report = format_grocery_report_for_slack(grocery_data)
 
@@ -0,0 +1,254 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+CHEAPEST_WITHIN_SLO = "cheapest_within_slo"
+FASTEST_WITHIN_BUDGET = "fastest_within_budget"
+POLICIES = [CHEAPEST_WITHIN_SLO, FASTEST_WITHIN_BUDGET]
+
+
+@dataclass
+class ModelConfig:
+    name: str
+    prompt_cost_per_million: float  # USD per 1M prompt tokens
+    completion_cost_per_million: float  # USD per 1M completion tokens
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.prompt_cost_per_million +
+                completion_tokens * self.completion_cost_per_million) / 1_000_000
+
+
+# Prices as listed on OpenRouter; adjust when the provider changes them
+DEFAULT_MODELS = [
+    ModelConfig("x-ai/grok-3-mini", 0.30, 0.50),
+    ModelConfig("mistralai/mistral-7b-instruct", 0.028, 0.054),
+    ModelConfig("google/gemini-2.0-flash-001", 0.10, 0.40),
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None if there are no samples."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class ModelStats:
+    """Rolling latency, error and token-cost window for one model.
+
+    The window holds at most `window` samples, none older than `max_age` seconds.
+    """
+
+    def __init__(self, config: ModelConfig, window: int = 200, max_age: float = 600.0):
+        self.config = config
+        self.max_age = max_age
+        # (monotonic time, value) pairs, oldest first
+        self.latencies: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self.outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window)  # True for an error
+        self.costs: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.estimated_calls = 0  # Calls whose token counts were estimated, not reported
+        self.last_chosen = 0.0  # Monotonic time this model was last routed to
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_cost = 0.0
+
+    def record(self, latency: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+               error: bool = False, estimated: bool = False):
+        now = time.monotonic()
+        self.expire(now)
+        self.calls += 1
+        self.outcomes.append((now, error))
+        if error:
+            self.errors += 1
+            return
+        if estimated:
+            self.estimated_calls += 1
+        cost = self.config.cost(prompt_tokens, completion_tokens)
+        self.latencies.append((now, latency))
+        self.costs.append((now, cost))
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.total_cost += cost
+
+    def expire(self, now: Optional[float] = None):
+        """Drop samples older than max_age so the stats follow provider drift."""
+        cutoff = (now if now is not None else time.monotonic()) - self.max_age
+        for samples in (self.latencies, self.outcomes, self.costs):
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+
+    @property
+    def samples(self) -> int:
+        return len(self.outcomes)
+
+    def p(self, pct: float) -> Optional[float]:
+        return percentile([latency for _, latency in self.latencies], pct)
+
+    @property
+    def error_rate(self) -> float:
+        return sum(error for _, error in self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def avg_cost(self) -> Optional[float]:
+        return sum(cost for _, cost in self.costs) / len(self.costs) if self.costs else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        def rounded(value, digits):
+            return round(value, digits) if value is not None else None
+
+        return {
+            "calls": self.calls,
+            "window_samples": self.samples,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "p50_seconds": rounded(self.p(50), 3),
+            "p95_seconds": rounded(self.p(95), 3),
+            "p99_seconds": rounded(self.p(99), 3),
+            "usage_estimated_calls": self.estimated_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "avg_cost_usd": rounded(self.avg_cost, 6),
+            "total_cost_usd": round(self.total_cost, 6),
+        }
+
+
+class ModelRouter:
+    """Pick a model per request from rolling per-model latency, error and cost stats.
+
+    Policies:
+    - cheapest_within_slo: cheapest model whose p95 latency is within `slo_p95_seconds`.
+    - fastest_within_budget: lowest p95 model whose average call cost is within `budget_usd`.
+
+    Until every configured model has `min_samples` calls, requests go to the
+    least-sampled model (ties in config order, so the first model, grok-3-mini
+    by default, serves first). After that, every `probe_every`-th request goes
+    to the model routed to least recently, and samples older than
+    `max_sample_age` seconds are dropped (a model left with fewer than
+    `min_samples` is explored again). A model that missed the SLO or hit
+    errors is therefore re-measured and can win traffic back when the provider
+    recovers. Otherwise models whose rolling error rate exceeds
+    `max_error_rate` are skipped.
+
+    Token counts are usually estimated: the agent closes the stream once the
+    action is known, before the final usage chunk arrives, and the provider
+    may bill for tokens generated after that. `report()` says how many calls
+    per model were estimated.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[ModelConfig]] = None,
+        policy: str = CHEAPEST_WITHIN_SLO,
+        slo_p95_seconds: float = 5.0,
+        budget_usd: float = 0.001,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        window: int = 200,
+        probe_every: int = 20,
+        max_sample_age: float = 600.0,
+        max_unconfigured: int = 20,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown routing policy '{policy}'. Choose one of: {', '.join(POLICIES)}")
+        self.policy = policy
+        self.slo_p95_seconds = slo_p95_seconds
+        self.budget_usd = budget_usd
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.window = window
+        self.max_sample_age = max_sample_age
+        self.max_unconfigured = max_unconfigured
+        # Explicitly requested models outside the config, least recently used first
+        self._unconfigured: "OrderedDict[str, None]" = OrderedDict()
+        self.probe_every = probe_every
+        self._routed = 0
+        self.models = [config.name for config in (models or DEFAULT_MODELS)]
+        self.stats: Dict[str, ModelStats] = {
+            config.name: ModelStats(config, window, max_sample_age) for config in (models or DEFAULT_MODELS)
+        }
+        self._lock = threading.Lock()
+
+    def _stats_for(self, model: str) -> ModelStats:
+        if model in self.models:
+            return self.stats[model]
+        # Explicitly requested model that is not configured: track it without a price,
+        # never route to it automatically, and keep only the most recent few so
+        # client-supplied names cannot grow the stats without bound
+        if model not in self.stats:
+            self.stats[model] = ModelStats(ModelConfig(model, 0.0, 0.0), self.window, self.max_sample_age)
+        self._unconfigured[model] = None
+        self._unconfigured.move_to_end(model)
+        while len(self._unconfigured) > self.max_unconfigured:
+            evicted, _ = self._unconfigured.popitem(last=False)
+            del self.stats[evicted]
+        return self.stats[model]
+
+    def choose(self, requested: Optional[str] = None) -> str:
+        """Return the model for this request; an explicitly requested model always wins."""
+        if requested:
+            return requested
+
+        with self._lock:
+            choice = self._choose_by_policy()
+            self.stats[choice].last_chosen = time.monotonic()
+            return choice
+
+    def _choose_by_policy(self) -> str:
+        candidates = [self.stats[name] for name in self.models]
+        self._routed += 1
+        now = time.monotonic()
+        for s in candidates:
+            s.expire(now)
+
+        # Explore: give every model enough samples before trusting its stats
+        unexplored = [s for s in candidates if s.samples < self.min_samples]
+        if unexplored:
+            return min(unexplored, key=lambda s: s.samples).config.name
+
+        # Probe: periodically re-measure the model avoided longest, so stats follow drift
+        if self.probe_every and self._routed % self.probe_every == 0:
+            return min(candidates, key=lambda s: s.last_chosen).config.name
+
+        healthy = [s for s in candidates if s.error_rate <= self.max_error_rate]
+        pool = healthy or candidates
+
+        def p95(s: ModelStats) -> float:
+            value = s.p(95)
+            return value if value is not None else 0.0
+
+        def price(s: ModelStats) -> float:
+            return s.config.prompt_cost_per_million + s.config.completion_cost_per_million
+
+        if self.policy == CHEAPEST_WITHIN_SLO:
+            eligible = [s for s in pool if p95(s) <= self.slo_p95_seconds]
+            if eligible:
+                return min(eligible, key=price).config.name
+            return min(pool, key=p95).config.name  # Nobody meets the SLO: take the fastest
+
+        eligible = [s for s in pool if s.avg_cost is None or s.avg_cost <= self.budget_usd]
+        if eligible:
+            return min(eligible, key=lambda s: (p95(s), price(s))).config.name
+        return min(pool, key=price).config.name  # Nobody fits the budget: take the cheapest
+
+    def record(self, model: str, latency: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, error: bool = False, estimated: bool = False):
+        with self._lock:
+            self._stats_for(model).record(latency, prompt_tokens, completion_tokens, error, estimated)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "slo_p95_seconds": self.slo_p95_seconds,
+                "budget_usd": self.budget_usd,
+                "usage_note": "token counts and costs of usage_estimated_calls are estimates "
+                              "(~4 chars/token of the text read before the stream was closed)",
+                "models": {name: s.as_dict() for name, s in self.stats.items()},
+            }
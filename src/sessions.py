@@ -0,0 +1,123 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+SUMMARY_CHARS = 200  # How much of each answer is kept as context for follow-ups
+
+
+class Session:
+    """Per-connection agent state for the WebSocket endpoint.
+
+    Holds the conversation history passed to the agent (answered prompts with
+    a short form of each answer) and the request tasks currently in flight.
+    The history is trimmed to stay under `max_bytes`.
+    """
+
+    def __init__(self, max_history: int = 10, max_bytes: int = 64 * 1024):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+        self.max_history = max_history
+        self.max_bytes = max_bytes
+        self.history: List[str] = []
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.send_lock = asyncio.Lock()  # One websocket frame at a time across concurrent requests
+        self.websocket: Any = None  # Connection that owns this session, set by the endpoint
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def add_turn(self, text: str, response: str):
+        """Record an answered prompt; call only once the answer has been produced."""
+        summary = " ".join(response.split())
+        if len(summary) > SUMMARY_CHARS:
+            summary = summary[:SUMMARY_CHARS] + "..."
+        self.history.append(f"{text} (answered: {summary})")
+        if len(self.history) > self.max_history:
+            self.history = self.history[-self.max_history:]
+        self._enforce_memory_cap()
+
+    def size_bytes(self) -> int:
+        return sum(len(turn.encode("utf-8")) for turn in self.history)
+
+    def _enforce_memory_cap(self):
+        # Drop the oldest turns first
+        while self.history and self.size_bytes() > self.max_bytes:
+            self.history.pop(0)
+
+    def cancel_all(self):
+        for task in self.in_flight.values():
+            task.cancel()
+        self.in_flight.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "session_id": self.id,
+            "age_seconds": round(now - self.created_at, 1),
+            "idle_seconds": round(now - self.last_active, 1),
+            "turns": len(self.history),
+            "in_flight": len(self.in_flight),
+            "size_bytes": self.size_bytes(),
+        }
+
+
+class SessionManager:
+    """Registry of open sessions with idle-timeout and LRU eviction.
+
+    `on_evict` is called with a session that must be closed, either because it
+    has been idle longer than `idle_timeout` or to make room under `max_sessions`.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_timeout: float = 300.0,
+                 max_in_flight: int = 16, **session_options):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_in_flight = max_in_flight
+        self.session_options = session_options
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.on_evict: Optional[Callable[[Session, str], Any]] = None
+
+    def open(self) -> Session:
+        self.evict_idle()
+        while len(self.sessions) >= self.max_sessions:
+            _, oldest = self.sessions.popitem(last=False)
+            self._evict(oldest, "evicted to make room for a new session")
+        session = Session(**self.session_options)
+        self.sessions[session.id] = session
+        return session
+
+    def touch(self, session: Session):
+        session.touch()
+        if session.id in self.sessions:
+            self.sessions.move_to_end(session.id)
+
+    def close(self, session: Session):
+        session.cancel_all()
+        self.sessions.pop(session.id, None)
+
+    def evict_idle(self):
+        now = time.monotonic()
+        # Sessions are kept in least-recently-active order
+        for session in list(self.sessions.values()):
+            if session.in_flight:
+                continue  # Still answering; the client is waiting, not idle
+            if now - session.last_active <= self.idle_timeout:
+                break
+            self.sessions.pop(session.id, None)
+            self._evict(session, "idle timeout")
+
+    def _evict(self, session: Session, reason: str):
+        session.cancel_all()
+        if self.on_evict:
+            self.on_evict(session, reason)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "open_sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "idle_timeout_seconds": self.idle_timeout,
+            "sessions": [session.as_dict() for session in self.sessions.values()],
+        }
@@ -0,0 +1,90 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Keywords that point at a tool. Matched against the lower-cased, preprocessed prompt.
+DEFAULT_TOOL_KEYWORDS = {
+    "get_bangalore_weather": [
+        "weather", "temperature", "rain", "raining", "forecast", "humid", "humidity", "sunny", "cloudy", "climate"
+    ],
+    "get_household_grocery_report": [
+        "grocery", "groceries", "stock", "deficit", "household", "rice", "sugar", "wheat"
+    ],
+}
+
+
+class ToolPredictor:
+    """Cheap keyword-based guess of the tool the LLM is about to pick."""
+
+    def __init__(self, tool_keywords: Optional[Dict[str, List[str]]] = None):
+        self.tool_keywords = tool_keywords or DEFAULT_TOOL_KEYWORDS
+
+    def predict(self, prompt: str) -> Optional[str]:
+        """Return the tool name with the most keyword hits, or None on a tie or no hit."""
+        # Match whole words so "rain" does not hit "train" or "stock" hit "Stockholm"
+        words = set(re.findall(r"\w+", prompt.lower()))
+        scores = {
+            name: sum(1 for keyword in keywords if keyword in words)
+            for name, keywords in self.tool_keywords.items()
+        }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] == 0:
+            return None
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            return None  # Ambiguous, not worth a wasted tool call
+        return ranked[0][0]
+
+
+@dataclass
+class SpeculationStats:
+    attempts: int = 0
+    hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+
+    def record_hit(self, llm_seconds: float, tool_seconds: float):
+        # Sequential cost is llm + tool, speculative cost is max(llm, tool)
+        self.hits += 1
+        self.saved_seconds += min(llm_seconds, tool_seconds)
+
+    def record_miss(self):
+        self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "saved_seconds": round(self.saved_seconds, 3),
+            "avg_saved_seconds_per_hit": round(self.saved_seconds / self.hits, 3) if self.hits else 0.0,
+        }
+
+
+@dataclass
+class Speculation:
+    """A tool call started before the LLM has confirmed it."""
+    tool_name: str
+    task: Optional[asyncio.Task] = None
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def tool_seconds(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def discard(self):
+        """Cancel the task if still running. Sync tools running in a thread finish in the background."""
+        if not self.task.done():
+            self.task.cancel()
+        else:
+            # Retrieve the exception, if any, so asyncio does not log it as unhandled
+            if not self.task.cancelled():
+                self.task.exception()
@@ -0,0 +1,88 @@
+from action_parser import IncrementalActionParser, parse_action
+
+
+def feed_chunks(chunks):
+    parser = IncrementalActionParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+def test_plain_object():
+    assert parse_action('{"action": "get_bangalore_weather", "action_input": "Bangalore"}') == {
+        "action": "get_bangalore_weather",
+        "action_input": "Bangalore",
+    }
+
+
+def test_code_fence_and_surrounding_prose():
+    text = (
+        "Sure, here is my answer:\n"
+        "```json\n"
+        '{"action": "get_household_grocery_report", "action_input": ""}\n'
+        "```\n"
+        "Let me know if you need anything else {really}."
+    )
+    assert parse_action(text) == {"action": "get_household_grocery_report", "action_input": ""}
+
+
+def test_skips_brace_in_prose_before_object():
+    text = 'Use {tool_name} like this: {"action": "get_bangalore_weather", "action_input": "x"}'
+    assert parse_action(text)["action"] == "get_bangalore_weather"
+
+
+def test_braces_and_brackets_inside_strings():
+    text = '{"action": "a", "action_input": "{not} [json]", "thought": "} ] {"}'
+    assert parse_action(text) == {"action": "a", "action_input": "{not} [json]", "thought": "} ] {"}
+
+
+def test_escaped_quotes():
+    text = r'{"action": "a", "action_input": "say \"hi\" \\", "thought": "x"}'
+    assert parse_action(text)["action_input"] == 'say "hi" \\'
+
+
+def test_nested_values():
+    text = '{"action": "a", "action_input": {"city": "Bangalore", "days": [1, {"n": 2}]}}'
+    assert parse_action(text)["action_input"] == {"city": "Bangalore", "days": [1, {"n": 2}]}
+
+
+def test_trailing_comma():
+    assert parse_action('{"action": "a", "action_input": "b",}') == {"action": "a", "action_input": "b"}
+
+
+def test_bare_primitives():
+    assert parse_action('{"action": 12, "a": true, "b": null, "c": -1.5e2}') == {
+        "action": 12, "a": True, "b": None, "c": -150.0,
+    }
+
+
+def test_no_object():
+    assert parse_action("I cannot help with that.") is None
+
+
+def test_character_by_character_matches_whole_text():
+    text = 'Here:\n```json\n{"action": "a", "action_input": "b \\" }", "n": [1, 2], "thought": "done"}\n```'
+    parser = feed_chunks(list(text))
+    assert parser.complete
+    assert parser.result() == parse_action(text)
+
+
+def test_fields_available_before_object_closes():
+    parser = feed_chunks(['{"action": "get_bang', 'alore_weather", "action_input": "x", "thought": "still thin'])
+    assert not parser.complete
+    assert parser.has("action", "action_input")
+    assert parser.fields == {"action": "get_bangalore_weather", "action_input": "x"}
+
+
+def test_primitive_split_across_chunks():
+    parser = IncrementalActionParser()
+    parser.feed('{"action": 12')
+    assert not parser.has("action")  # The number may continue in the next chunk
+    parser.feed("3}")
+    assert parser.complete
+    assert parser.result() == {"action": 123}
+
+
+def test_ignores_text_after_completion():
+    parser = feed_chunks(['{"action": "a"}', ' and also {"action": "b"}'])
+    assert parser.result() == {"action": "a"}
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from batch_runner import BatchRunner, Checkpoint, recover_output
+
+
+class FakeAgent:
+    def __init__(self, hang_on=None, fail_on=None):
+        self.hang_on = hang_on
+        self.fail_on = fail_on
+        self.seen = []
+
+    async def run(self, text, max_steps=5, model=None):
+        await asyncio.sleep(0)
+        if text == self.hang_on:
+            await asyncio.Event().wait()  # Never answers; the run is interrupted around it
+        if text == self.fail_on:
+            raise RuntimeError("boom")
+        self.seen.append(text)
+        return f"answer to {text}"
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def make_runner(tmp_path, agent, **options):
+    options.setdefault("progress_interval", 60.0)
+    return BatchRunner(agent, str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"),
+                       str(tmp_path / "out.ckpt"), **options)
+
+
+def prompts(count):
+    return [json.dumps({"text": f"p{i}"}) for i in range(count)]
+
+
+def test_runs_every_line_once(tmp_path):
+    write_lines(tmp_path / "in.jsonl", prompts(10))
+    asyncio.run(make_runner(tmp_path, FakeAgent(), concurrency=3).run())
+
+    results = read_results(tmp_path / "out.jsonl")
+    assert sorted(r["index"] for r in results) == list(range(10))
+    assert all(r["response"] == f"answer to p{r['index']}" for r in results)
+    assert json.loads((tmp_path / "out.ckpt").read_text())["watermark"] == 10
+
+
+def test_resume_after_interrupt_has_no_duplicates_or_gaps(tmp_path):
+    write_lines(tmp_path / "in.jsonl", prompts(10))
+    runner = make_runner(tmp_path, FakeAgent(hang_on="p5"), concurrency=3)
+    try:
+        asyncio.run(asyncio.wait_for(runner.run(), timeout=0.2))  # Like Ctrl-C mid-run
+        assert False, "expected the run to be interrupted"
+    except asyncio.TimeoutError:
+        pass
+    first_run = {r["index"] for r in read_results(tmp_path / "out.jsonl")}
+    assert 5 not in first_run
+
+    agent = FakeAgent()
+    asyncio.run(make_runner(tmp_path, agent, concurrency=3).run())
+
+    indexes = [r["index"] for r in read_results(tmp_path / "out.jsonl")]
+    assert sorted(indexes) == list(range(10))
+    assert not first_run & {int(text[1:]) for text in agent.seen}
+
+
+def test_resume_recovers_out_of_order_results_and_truncates_partial_line(tmp_path):
+    # A hard kill: the checkpoint lags the output, and the last write was cut short
+    write_lines(tmp_path / "in.jsonl", prompts(5))
+    (tmp_path / "out.ckpt").write_text(json.dumps({"watermark": 1, "completed": 1}))
+    (tmp_path / "out.jsonl").write_text(
+        json.dumps({"index": 0, "response": "a"}) + "\n" +
+        json.dumps({"index": 2, "response": "c"}) + "\n" +
+        '{"index": 3, "resp',
+        encoding="utf-8",
+    )
+
+    agent = FakeAgent()
+    asyncio.run(make_runner(tmp_path, agent).run())
+
+    assert sorted(agent.seen) == ["p1", "p3", "p4"]
+    indexes = [r["index"] for r in read_results(tmp_path / "out.jsonl")]
+    assert sorted(indexes) == list(range(5))
+
+
+def test_recover_output_keeps_complete_lines(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(json.dumps({"index": 4}) + "\n" + json.dumps({"index": 1}) + "\n" + '{"ind',
+                    encoding="utf-8")
+
+    assert recover_output(str(path), watermark=2) == {4}
+    assert path.read_text(encoding="utf-8").endswith("\n")
+    assert len(read_results(path)) == 2
+
+
+def test_blank_invalid_and_non_object_lines(tmp_path):
+    write_lines(tmp_path / "in.jsonl", [
+        json.dumps({"text": "p0"}),
+        "",
+        "   ",
+        "{not json",
+        "[1, 2]",
+        json.dumps("p5"),
+        json.dumps({"other": "x"}),
+        json.dumps({"text": "p7"}),
+    ])
+    runner = make_runner(tmp_path, FakeAgent(fail_on="p7"))
+    asyncio.run(runner.run())
+
+    results = {r["index"]: r for r in read_results(tmp_path / "out.jsonl")}
+    assert set(results) == {0, 3, 4, 5, 6, 7}  # Blank lines are skipped, not reported
+    assert results[0]["response"] == "answer to p0"
+    assert results[3]["error"] == "invalid JSON line"
+    assert results[4]["error"] == "line is not a JSON object or string"
+    assert results[5]["response"] == "answer to p5"
+    assert results[6]["error"] == "missing 'text' field"
+    assert results[7]["error"] == "boom"
+    assert (runner.succeeded, runner.failed, runner.skipped) == (2, 4, 2)
+    assert json.loads((tmp_path / "out.ckpt").read_text())["watermark"] == 8
+
+
+def test_checkpoint_watermark_waits_for_gaps(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "ckpt"), every=100)
+    for index in (1, 2, 4):
+        checkpoint.mark_done(index)
+    assert checkpoint.watermark == 0
+    checkpoint.mark_done(0)
+    assert checkpoint.watermark == 3
+    checkpoint.mark_done(3)
+    assert checkpoint.watermark == 5
@@ -0,0 +1,112 @@
+import types
+
+import model_router
+from model_router import CHEAPEST_WITHIN_SLO, ModelConfig, ModelRouter
+
+MODELS = [
+    ModelConfig("expensive", 1.0, 1.0),
+    ModelConfig("cheap", 0.1, 0.1),
+    ModelConfig("middle", 0.5, 0.5),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def make_router(monkeypatch, **options):
+    clock = FakeClock()
+    monkeypatch.setattr(model_router, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    options.setdefault("probe_every", 0)  # Probing is tested on its own
+    return ModelRouter(models=MODELS, policy=CHEAPEST_WITHIN_SLO, slo_p95_seconds=1.0,
+                       min_samples=2, **options), clock
+
+
+def warm_up(router, latencies, errors=()):
+    """Route requests until every model has min_samples, recording the given outcome per model."""
+    while any(router.stats[name].samples < router.min_samples for name in router.models):
+        model = router.choose()
+        router.record(model, latencies[model], 100, 10, error=model in errors)
+
+
+def test_explores_each_model_until_min_samples(monkeypatch):
+    router, _ = make_router(monkeypatch)
+    chosen = []
+    for _ in range(6):
+        model = router.choose()
+        chosen.append(model)
+        router.record(model, 0.1, 100, 10)
+    # Least-sampled first, ties in config order
+    assert chosen == ["expensive", "cheap", "middle"] * 2
+
+
+def test_cheapest_within_slo(monkeypatch):
+    router, _ = make_router(monkeypatch)
+    warm_up(router, {"expensive": 0.2, "cheap": 0.5, "middle": 0.3})
+    assert router.choose() == "cheap"
+
+
+def test_skips_models_over_slo(monkeypatch):
+    router, _ = make_router(monkeypatch)
+    warm_up(router, {"expensive": 0.2, "cheap": 3.0, "middle": 0.3})
+    assert router.choose() == "middle"
+
+
+def test_falls_back_to_fastest_when_none_meets_slo(monkeypatch):
+    router, _ = make_router(monkeypatch)
+    warm_up(router, {"expensive": 2.0, "cheap": 5.0, "middle": 3.0})
+    assert router.choose() == "expensive"
+
+
+def test_skips_models_over_max_error_rate(monkeypatch):
+    router, _ = make_router(monkeypatch, max_error_rate=0.5)
+    warm_up(router, {"expensive": 0.2, "cheap": 0.2, "middle": 0.2}, errors={"cheap"})
+    assert router.stats["cheap"].error_rate == 1.0
+    assert router.choose() == "middle"
+
+
+def test_explicit_model_wins(monkeypatch):
+    router, _ = make_router(monkeypatch)
+    assert router.choose("someone/else") == "someone/else"
+
+
+def test_old_samples_expire_and_model_is_explored_again(monkeypatch):
+    router, clock = make_router(monkeypatch, max_sample_age=60.0)
+    warm_up(router, {"expensive": 0.2, "cheap": 3.0, "middle": 0.3})
+    assert router.choose() == "middle"
+
+    # Keep the other models fresh while cheap's slow samples age out
+    clock.now += 45
+    for name in ("expensive", "middle"):
+        for _ in range(router.min_samples):
+            router.record(name, 0.2, 100, 10)
+    clock.now += 30
+
+    assert router.choose() == "cheap"
+    assert router.stats["cheap"].samples == 0
+
+
+def test_probes_least_recently_chosen_model(monkeypatch):
+    router, clock = make_router(monkeypatch, probe_every=3)
+    warm_up(router, {"expensive": 0.2, "cheap": 3.0, "middle": 0.3})
+    chosen = []
+    for _ in range(6):
+        clock.now += 1
+        model = router.choose()
+        chosen.append(model)
+        router.record(model, {"expensive": 0.2, "cheap": 3.0, "middle": 0.3}[model], 100, 10)
+    assert "cheap" in chosen
+    assert chosen.count("middle") >= 4
+
+
+def test_unconfigured_models_are_bounded(monkeypatch):
+    router, _ = make_router(monkeypatch, max_unconfigured=3)
+    for i in range(10):
+        router.record(f"client/model-{i}", 0.1, 10, 10)
+    unconfigured = [name for name in router.stats if name not in router.models]
+    assert unconfigured == ["client/model-7", "client/model-8", "client/model-9"]
+    assert set(router.models) <= set(router.stats)
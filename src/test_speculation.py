@@ -0,0 +1,62 @@
+import asyncio
+import gc
+
+from speculation import Speculation, SpeculationStats, ToolPredictor
+
+
+def test_predicts_weather_and_groceries():
+    predictor = ToolPredictor()
+    assert predictor.predict("Find Bangalore weather") == "get_bangalore_weather"
+    assert predictor.predict("get me the household grocery report") == "get_household_grocery_report"
+
+
+def test_matches_whole_words_only():
+    predictor = ToolPredictor()
+    assert predictor.predict("when is the next train to Stockholm") is None
+    assert predictor.predict("brain teaser") is None
+
+
+def test_no_prediction_on_tie_or_no_keywords():
+    predictor = ToolPredictor()
+    assert predictor.predict("weather and groceries") is None
+    assert predictor.predict("tell me a joke") is None
+
+
+def test_stats_hit_and_miss():
+    stats = SpeculationStats()
+    stats.attempts = 2
+    stats.record_hit(llm_seconds=1.0, tool_seconds=0.4)
+    stats.record_miss()
+    report = stats.as_dict()
+    assert report["hits"] == 1
+    assert report["misses"] == 1
+    assert report["hit_rate"] == 0.5
+    assert report["saved_seconds"] == 0.4  # min(llm, tool)
+
+
+def test_discard_cancels_running_task():
+    async def scenario():
+        speculation = Speculation(tool_name="t", task=asyncio.create_task(asyncio.sleep(10)))
+        speculation.discard()
+        await asyncio.sleep(0)
+        return speculation.task.cancelled()
+
+    assert asyncio.run(scenario())
+
+
+def test_discard_retrieves_exception_of_finished_task():
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+        speculation = Speculation(tool_name="t", task=asyncio.create_task(fail()))
+        await asyncio.sleep(0)
+        speculation.discard()
+        del speculation
+        gc.collect()
+        return unhandled
+
+    assert asyncio.run(scenario()) == []
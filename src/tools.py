@@ -8,8 +8,8 @@ from dotenv import load_dotenv
 import os
 import httpx
 import traceback
-from grocery import get_household_grocery_report
-from weather_utils import fetch_weather_data
+from grocery import fetch_household_grocery_report, publish_household_grocery_report
+from weather_utils import fetch_weather_data, sanitize_location
 import asyncio  # Add this import to handle async calls
 
 # Configure logging
@@ -37,40 +37,43 @@ def calculator(expression: str) -> str:
         return f"Error evaluating expression: {e}"
 
 # --- weather api start ---
-async def handle_weather_request(location: str) -> str:
-    """Handle the entire weather request as a single asynchronous unit."""
-    if not location:
-        location = "Bangalore"
+async def fetch_weather_report(location: str) -> Dict[str, Any]:
+    """Fetch the weather without posting it anywhere, so it is safe to run speculatively."""
+    # The weather API is Bangalore-only, so the result does not depend on the LLM's action_input
+    location = await sanitize_location(location)
 
     try:
         logging.info(f"Attempting to fetch real-time weather data for {location}.")
         # Fetch weather data asynchronously
-        weather_data = await fetch_weather_data(location)
-
-        # Post the weather data to Slack
-        await post_json_to_slack({
+        weather_data = await fetch_weather_data(location, post_to_slack=False)
+        logging.info(f"Real-time weather data fetched successfully for {location}.")
+        return {
             "location": location,
             "temperature": weather_data["temperature"],
             "condition": weather_data["condition"]
-        })
-
-        logging.info(f"Real-time weather data fetched successfully for {location}.")
-        return f"Real-time weather in {location}: {weather_data['temperature']}, {weather_data['condition']}"
+        }
     except Exception as e:
         logging.error(f"General error occurred: {e}")
-        logging.info("Falling back to simulated weather data.")
 
     # Fallback to simulated data
     logging.info("Falling back to simulated weather data.")
-    simulated_temperature = "28C"
-    simulated_condition = "Partly Cloudy"
-    await post_json_to_slack({
+    return {
         "location": location,
-        "temperature": simulated_temperature,
-        "condition": simulated_condition,
+        "temperature": "28C",
+        "condition": "Partly Cloudy",
         "source": "simulated"
-    })
-    return f"Simulated weather in {location}: {simulated_temperature}, {simulated_condition}"
+    }
+
+async def publish_weather_report(report: Dict[str, Any]) -> str:
+    """Post a weather report to Slack and return the answer text."""
+    await post_json_to_slack(report)
+    if report.get("source") == "simulated":
+        return f"Simulated weather in {report['location']}: {report['temperature']}, {report['condition']}"
+    return f"Real-time weather in {report['location']}: {report['temperature']}, {report['condition']}"
+
+async def handle_weather_request(location: str) -> str:
+    """Handle the entire weather request as a single asynchronous unit."""
+    return await publish_weather_report(await fetch_weather_report(location))
 # --- weather api end ---
 
 def get_bangalore_bus(route_number: str) -> str:
@@ -106,7 +109,9 @@ TOOLS = [
     {
         "name": "get_bangalore_weather",
         "description": "Fetch Bangalore weather and post to Slack.",
-        "func": handle_weather_request
+        "func": fetch_weather_report,
+        "publish": publish_weather_report,
+        "speculative": True
     },
     {
         "name": "bangalore_bus",
@@ -116,6 +121,8 @@ TOOLS = [
     {
         "name": "get_household_grocery_report",
         "description": "Generate a detailed household grocery report. Use this tool for queries about groceries, stock, or deficits.",
-        "func": get_household_grocery_report
+        "func": fetch_household_grocery_report,
+        "publish": publish_household_grocery_report,
+        "speculative": True
     },
 ]
@@ -22,8 +22,8 @@ async def sanitize_location(location: str) -> str:
     logging.debug(f"Sanitized location: {sanitized_location}")
     return sanitized_location
 
-async def fetch_weather_data(location: str) -> Dict[str, Any]:
-    """Fetch weather data using multiple APIs."""
+async def fetch_weather_data(location: str, post_to_slack: bool = True) -> Dict[str, Any]:
+    """Fetch weather data using multiple APIs. Pass post_to_slack=False for a side-effect free fetch."""
 
     # Sanitize input location
     sanitized_location = await sanitize_location(location)
@@ -85,6 +85,9 @@ async def fetch_weather_data(location: str) -> Dict[str, Any]:
             "source": "error"
         }
 
+    if not post_to_slack:
+        return weather_data
+
     # Post weather data to Slack
     try:
         await post_json_to_slack(weather_data)